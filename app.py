@@ -1,4 +1,5 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
@@ -6,12 +7,19 @@ import os
 import json
 import zipfile
 import shutil
+import time
+import secrets
+import tempfile
 import glob
 import re
 import textstat
-import nltk
+import orjson
 from spellchecker import SpellChecker
 from datetime import datetime
+from collections import Counter
+from operator import itemgetter
+from functools import lru_cache
+from types import MappingProxyType
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -19,12 +27,41 @@ from reportlab.lib.units import inch
 from reportlab.lib import colors
 import io
 
+# orjson options matching Flask's default provider (sorted keys, non-string keys allowed).
+# Dates and dataclasses are passed through to the provider's default hook, as Flask does
+ORJSON_OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+                  | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson for plain dumps and responses"""
+    def dumps(self, obj, **kwargs):
+        # Callers passing json options (e.g. the session serializer, tojson) keep Flask's behaviour
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialize straight to bytes for jsonify responses"""
+        # Indented output (debug mode or compact disabled) is left to Flask
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = 'your-secret-key-change-this-in-production'
 app.config['UPLOAD_FOLDER'] = 'store'
 app.config['UNPACKED_FOLDER'] = 'unpacked'
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500 MB max file size
 ALLOWED_EXTENSIONS = {'mcworld', 'mctemplate'}
+UPLOAD_BUFFER_SIZE = 1024 * 1024  # 1 MB chunks when writing uploads to disk
 
 # Create directories if they don't exist
 for folder in [app.config['UPLOAD_FOLDER'], app.config['UNPACKED_FOLDER']]:
@@ -74,6 +111,52 @@ class User(UserMixin):
 # User storage file
 USERS_FILE = 'users.json'
 
+# Basic email validation used when creating accounts
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Letters, numbers, hyphens and underscores, with at least one letter or number
+USERNAME_PATTERN = re.compile(r'^(?=.*[^\W_])[\w-]+\Z')
+
+def get_file_signature(file_path):
+    """Return (mtime_ns, size) for a file so changes on disk can be detected"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def write_json_file(file_path, data):
+    """Write a JSON file atomically so an interrupted save can't leave it truncated"""
+    # A unique temp file per save, so concurrent writers never share one
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except:
+        os.unlink(temp_path)
+        raise
+    json_file_cache.pop(file_path, None)
+
+# Parsed JSON stores keyed by path, reparsed only when the file changes on disk
+json_file_cache = {}
+
+def load_json_cached(file_path, default):
+    """Get the cache entry for a JSON file, reloading it if the file changed"""
+    signature = get_file_signature(file_path)
+    cached = json_file_cache.get(file_path)
+    if cached is None or signature is None or cached['signature'] != signature:
+        try:
+            with open(file_path, 'r') as f:
+                data = json.load(f)
+        except:
+            data = default
+        cached = {'signature': signature, 'data': data, 'index': None, 'emails': None, 'sorted': {}}
+        json_file_cache[file_path] = cached
+    return cached
+
 def load_users():
     """Load users from JSON file"""
     try:
@@ -107,16 +190,20 @@ def load_users():
 
 def save_users_to_file(users_data):
     """Save users data to JSON file"""
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users_data, f, indent=2)
+    write_json_file(USERS_FILE, users_data)
 
 def get_users_data():
     """Get raw users data from file"""
-    try:
-        with open(USERS_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return {}
+    # Copy each user so callers can modify the result without touching the cache
+    users_data = load_json_cached(USERS_FILE, {})['data']
+    return {username: dict(user_data) for username, user_data in users_data.items()}
+
+def is_registered_email(email):
+    """Check if an email address belongs to an existing user"""
+    cached = load_json_cached(USERS_FILE, {})
+    if cached['emails'] is None:
+        cached['emails'] = {user_data.get('email', '').lower() for user_data in cached['data'].values()}
+    return email.lower() in cached['emails']
 
 def is_admin(username):
     """Check if user is admin"""
@@ -141,16 +228,15 @@ def get_next_user_id():
     return str(max_id + 1)
 
 def create_user(username, password, first_name, surname, email, is_admin=False):
-    """Create a new user"""
+    """Create a new user, returning (success, message, user data or None)"""
     users_data = get_users_data()
     
     if username in users_data:
-        return False, "Username already exists"
+        return False, "Username already exists", None
     
     # Check if email already exists
-    for user_data in users_data.values():
-        if user_data.get('email', '').lower() == email.lower():
-            return False, "Email address already exists"
+    if is_registered_email(email):
+        return False, "Email address already exists", None
     
     user_id = get_next_user_id()
     users_data[username] = {
@@ -165,7 +251,7 @@ def create_user(username, password, first_name, surname, email, is_admin=False):
     }
     
     save_users_to_file(users_data)
-    return True, "User created successfully"
+    return True, "User created successfully", users_data[username]
 
 def delete_user_and_data(username):
     """Delete user and all associated data"""
@@ -218,8 +304,13 @@ def delete_user_and_data(username):
     except Exception as e:
         return False, f"Error deleting user data: {str(e)}"
 
+def index_users_by_id(users):
+    """Build an ID to User lookup so Flask-Login can resolve users in O(1)"""
+    return {user.id: user for user in users.values()}
+
 # Load users on startup
 users = load_users()
+users_by_id = index_users_by_id(users)
 
 def allowed_file(filename):
     """Check if file has allowed extension"""
@@ -241,31 +332,60 @@ def get_folder_size_mb(folder_path):
                 total_size += os.path.getsize(filepath)
     return round(total_size / (1024 * 1024), 2)
 
+def get_folder_signature(folder_path):
+    """Get a cheap signature of a folder's contents (file count, total size, newest mtime)"""
+    file_count = 0
+    total_size = 0
+    latest_mtime = 0
+    for dirpath, dirnames, filenames in os.walk(folder_path):
+        for filename in filenames:
+            try:
+                stat = os.stat(os.path.join(dirpath, filename))
+            except OSError:
+                continue
+            file_count += 1
+            total_size += stat.st_size
+            latest_mtime = max(latest_mtime, stat.st_mtime_ns)
+    return file_count, total_size, latest_mtime
+
 def load_metadata():
     """Load metadata from JSON file"""
-    try:
-        with open(METADATA_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return []
+    # Copy each entry so callers can modify the result without touching the cache
+    return [dict(world) for world in load_json_cached(METADATA_FILE, [])['data']]
 
 def load_unpacked_metadata():
     """Load unpacked metadata from JSON file"""
-    try:
-        with open(UNPACKED_METADATA_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return []
+    return [dict(world) for world in load_json_cached(UNPACKED_METADATA_FILE, [])['data']]
+
+def load_metadata_newest_first(metadata_file, date_key):
+    """Load metadata sorted by date (newest first), sorting once per change to the file"""
+    cached = load_json_cached(metadata_file, [])
+    sorted_entries = cached['sorted']
+    if date_key not in sorted_entries:
+        sorted_entries[date_key] = sorted(cached['data'], key=itemgetter(date_key), reverse=True)
+    return [dict(world) for world in sorted_entries[date_key]]
 
 def save_metadata(metadata):
     """Save metadata to JSON file"""
-    with open(METADATA_FILE, 'w') as f:
-        json.dump(metadata, f, indent=2)
+    write_json_file(METADATA_FILE, metadata)
 
 def save_unpacked_metadata(metadata):
     """Save unpacked metadata to JSON file"""
-    with open(UNPACKED_METADATA_FILE, 'w') as f:
-        json.dump(metadata, f, indent=2)
+    write_json_file(UNPACKED_METADATA_FILE, metadata)
+
+def get_indexed_entry(metadata_file, entry_id):
+    """Look up a metadata entry by ID through a cached id -> entry index"""
+    cached = load_json_cached(metadata_file, [])
+    if cached['index'] is None:
+        # IDs are assigned as len + 1 and can repeat after deletions; keep the first match
+        cached['index'] = {entry['id']: entry for entry in reversed(cached['data'])}
+    entry = cached['index'].get(entry_id)
+    # Return a copy so callers can't modify the cached entry
+    return dict(entry) if entry else None
+
+def get_world_by_id(world_id):
+    """Get world metadata by ID"""
+    return get_indexed_entry(METADATA_FILE, world_id)
 
 def migrate_existing_metadata():
     """Add missing fields to existing metadata for backward compatibility"""
@@ -390,6 +510,26 @@ def clean_unpacked_metadata():
     
     return needs_update
 
+# Housekeeping reruns when either metadata file changes, or after this many seconds
+# to pick up unpacked folders removed outside the app
+HOUSEKEEPING_INTERVAL = 60
+housekeeping_state = {'signatures': None, 'last_run': 0}
+
+def run_metadata_housekeeping():
+    """Clean up unpacked metadata and statuses if anything may have changed since the last run"""
+    signatures = (get_file_signature(METADATA_FILE), get_file_signature(UNPACKED_METADATA_FILE))
+    now = time.monotonic()
+    if signatures == housekeeping_state['signatures'] and now - housekeeping_state['last_run'] < HOUSEKEEPING_INTERVAL:
+        return
+    
+    clean_unpacked_metadata()
+    verify_unpacked_status()
+    prune_analysis_caches()
+    
+    # Record the signatures after cleanup, which may itself have saved the files
+    housekeeping_state['signatures'] = (get_file_signature(METADATA_FILE), get_file_signature(UNPACKED_METADATA_FILE))
+    housekeeping_state['last_run'] = now
+
 def unpack_world(world_id, username):
     """Unpack a world file and add to unpacked metadata"""
     metadata = load_metadata()
@@ -449,6 +589,7 @@ def unpack_world(world_id, username):
             'original_world_id': world_id,
             'folder_name': folder_name,
             'original_filename': world['original_filename'],
+            'safe_filename': secure_filename(world['original_filename']),
             'unpacked_by': username,
             'unpacked_date': datetime.now().isoformat(),
             'folder_size_mb': folder_size_mb,
@@ -651,52 +792,57 @@ def extract_language_code(filename):
     # Default for unknown
     return 'Unknown'
 
+def resolve_unpacked_file_path(world, file_path):
+    """Get the absolute path of a file inside an unpacked world, or None if it points outside it"""
+    unpacked_folder = os.path.abspath(os.path.join(app.config['UNPACKED_FOLDER'], world['folder_name']))
+    full_path = os.path.abspath(os.path.join(unpacked_folder, file_path))
+    if os.path.commonpath([full_path, unpacked_folder]) != unpacked_folder:
+        return None
+    return full_path
+
 def get_unpacked_world_by_id(unpacked_id):
     """Get unpacked world metadata by ID"""
-    unpacked_metadata = load_unpacked_metadata()
-    for world in unpacked_metadata:
-        if world['id'] == unpacked_id:
-            return world
-    return None
-
+    return get_indexed_entry(UNPACKED_METADATA_FILE, unpacked_id)
+
+# Key patterns that indicate educational/user-facing content, compiled into a
+# single case-insensitive alternation so each key is scanned once
+EDUCATIONAL_KEY_PATTERN = re.compile('|'.join([
+    # NPC and character dialog
+    r'npc\.|character\.|\.dialog\.|\.dialogue\.',
+    # Educational content and instructions
+    r'lesson\.|tutorial\.|instruction\.|guide\.|help\.',
+    # Story and narrative content
+    r'story\.|narrative\.|text\.|message\.|description\.',
+    # Signs and books content
+    r'sign\.|book\.|page\.|chapter\.',
+    # Chat and conversation
+    r'chat\.|conversation\.|speak\.|say\.',
+    # Educational activities
+    r'activity\.|exercise\.|task\.|quest\.|mission\.',
+    # Custom content entries (often educational)
+    r'custom\.|edu\.|learn\.|teach\.',
+    # World-specific content
+    r'world\.|level\.|stage\.',
+    # Minecraft Education specific patterns
+    r'\.name\.',  # Names/titles for educational elements
+    r'\.title\.',  # Titles
+    r'convo\.',   # Conversations
+    r'dialogue\.',  # Dialogue
+    # Common educational prefixes in MC:EE
+    r'agent\.',   # Agent activities
+    r'board\.',   # Chalkboard/whiteboard content
+    r'slate\.',   # Slate content
+    r'poster\.'   # Poster content
+]), re.IGNORECASE)
+
+# Classifications are cached since the same language entries are checked again by
+# every analysis, spell check and editor check of a world
+@lru_cache(maxsize=8192)
 def is_educational_content(key, value):
     """Determine if this key-value pair contains educational content that users see"""
-    key_lower = key.lower()
-    
-    # Include patterns that indicate educational/user-facing content
-    educational_patterns = [
-        # NPC and character dialog
-        r'npc\.|character\.|\.dialog\.|\.dialogue\.',
-        # Educational content and instructions
-        r'lesson\.|tutorial\.|instruction\.|guide\.|help\.',
-        # Story and narrative content
-        r'story\.|narrative\.|text\.|message\.|description\.',
-        # Signs and books content
-        r'sign\.|book\.|page\.|chapter\.',
-        # Chat and conversation
-        r'chat\.|conversation\.|speak\.|say\.',
-        # Educational activities
-        r'activity\.|exercise\.|task\.|quest\.|mission\.',
-        # Custom content entries (often educational)
-        r'custom\.|edu\.|learn\.|teach\.',
-        # World-specific content
-        r'world\.|level\.|stage\.',
-        # Minecraft Education specific patterns
-        r'\.name\.',  # Names/titles for educational elements
-        r'\.title\.',  # Titles
-        r'convo\.',   # Conversations
-        r'dialogue\.',  # Dialogue
-        # Common educational prefixes in MC:EE
-        r'agent\.',   # Agent activities
-        r'board\.',   # Chalkboard/whiteboard content
-        r'slate\.',   # Slate content
-        r'poster\.'   # Poster content
-    ]
-    
     # Check if key matches educational patterns
-    for pattern in educational_patterns:
-        if re.search(pattern, key_lower):
-            return True
+    if EDUCATIONAL_KEY_PATTERN.search(key):
+        return True
     
     # Additional checks for value content
     if len(value.strip()) < 3:  # Skip very short values
@@ -726,6 +872,10 @@ def is_educational_content(key, value):
     
     return has_sentence_structure
 
+# Matches a "key=value" .lang entry, capturing the stripped key and value.
+# Comment lines (first non-blank character is '#') and lines without '=' don't match.
+LANG_ENTRY_PATTERN = re.compile(r'^\s*(?:([^\s#=][^=]*?)\s*)?=\s*(.*?)\s*$')
+
 def extract_text_from_lang_file(file_path):
     """Extract educational content from a .lang file, filtering out technical and system content"""
     
@@ -758,39 +908,33 @@ def extract_text_from_lang_file(file_path):
         return ' '.join(words).strip()
     
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-        
-        if not content.strip():
-            return ""
-        
         educational_text = []
-        lines = content.split('\n')
         
-        for line in lines:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                try:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    
-                    # Skip empty values
-                    if not value:
-                        continue
-                    
-                    # Filter for educational content
-                    if is_educational_content(key, value):
-                        cleaned_text = clean_educational_text(value)
-                        
-                        # Final quality check - must have substantial readable content
-                        if (len(cleaned_text) > 10 and 
-                            re.search(r'[a-zA-Z]', cleaned_text) and
-                            len(cleaned_text.split()) >= 3):
-                            educational_text.append(cleaned_text)
+        # Stream the file line by line so the whole content and its
+        # line list are never held in memory alongside the results
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                # Single match yields the stripped key and value, skipping comments
+                match = LANG_ENTRY_PATTERN.match(line)
+                if not match:
+                    continue
                 
-                except ValueError:
+                key = match.group(1) or ''
+                value = match.group(2)
+                
+                # Skip empty values
+                if not value:
                     continue
+                
+                # Filter for educational content
+                if is_educational_content(key, value):
+                    cleaned_text = clean_educational_text(value)
+                    
+                    # Final quality check - must have substantial readable content
+                    if (len(cleaned_text) > 10 and 
+                        re.search(r'[a-zA-Z]', cleaned_text) and
+                        len(cleaned_text.split()) >= 3):
+                        educational_text.append(cleaned_text)
         
         # Join all educational text
         result = ' '.join(educational_text)
@@ -800,42 +944,6 @@ def extract_text_from_lang_file(file_path):
         
         return result
     
-    except UnicodeDecodeError:
-        # Try with different encoding
-        try:
-            with open(file_path, 'r', encoding='latin-1', errors='ignore') as f:
-                content = f.read()
-            
-            educational_text = []
-            lines = content.split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    try:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        value = value.strip()
-                        
-                        if not value:
-                            continue
-                        
-                        if is_educational_content(key, value):
-                            cleaned_text = clean_educational_text(value)
-                            
-                            if (len(cleaned_text) > 10 and 
-                                re.search(r'[a-zA-Z]', cleaned_text) and
-                                len(cleaned_text.split()) >= 3):
-                                educational_text.append(cleaned_text)
-                    
-                    except ValueError:
-                        continue
-            
-            result = ' '.join(educational_text)
-            return re.sub(r'\s+', ' ', result).strip()
-            
-        except:
-            return ""
     except Exception as e:
         return ""
 
@@ -955,9 +1063,8 @@ def perform_language_analysis(unpacked_folder_name):
             with open(largest_file['full_path'], 'r', encoding='utf-8', errors='ignore') as f:
                 raw_content = f.read()
             
-            raw_lines = [line.strip() for line in raw_content.split('\n') 
-                        if line.strip() and not line.strip().startswith('#') and '=' in line]
-            total_entries = len(raw_lines)
+            total_entries = sum(1 for line in raw_content.split('\n')
+                                if LANG_ENTRY_PATTERN.match(line))
             
         except:
             total_entries = 0
@@ -1037,6 +1144,17 @@ def perform_language_analysis(unpacked_folder_name):
     except Exception as e:
         return None, f"Error during analysis: {str(e)}"
 
+# Language analyses keyed by unpacked folder, replaced when the folder changes on disk
+language_analysis_cache = {}
+
+def perform_language_analysis_cached(unpacked_folder_name, folder_signature):
+    """Get the language analysis for a folder, rerun only when its signature changes"""
+    cached = language_analysis_cache.get(unpacked_folder_name)
+    if cached is None or cached['signature'] != folder_signature:
+        cached = {'signature': folder_signature, 'result': perform_language_analysis(unpacked_folder_name)}
+        language_analysis_cache[unpacked_folder_name] = cached
+    return cached['result']
+
 def perform_spell_check(unpacked_folder_name):
     """Find English language files and perform comprehensive spell checking"""
     try:
@@ -1092,12 +1210,9 @@ def perform_spell_check(unpacked_folder_name):
         
         # Initialize spell checker with custom dictionary
         try:
-            spell = SpellChecker()
-            
-            # Load custom Minecraft dictionary
-            custom_dict = load_custom_dictionary()
-            if custom_dict:
-                spell.word_frequency.load_words(custom_dict)
+            # Load custom Minecraft dictionary (creates the default one if missing)
+            custom_dict_words = load_custom_dictionary()
+            spell = get_spell_checker(os.path.join(app.config['UPLOAD_FOLDER'], 'custom_dictionary.txt'))
                 
         except Exception as e:
             return None, f"Error initializing spell checker: {str(e)}"
@@ -1142,6 +1257,8 @@ def perform_spell_check(unpacked_folder_name):
         # Generate suggestions for misspelled words
         spell_results = []
         try:
+            # Lowercase each word once and count, instead of rescanning per misspelling
+            word_counts = Counter(w.lower() for w in words)
             for word in misspelled:
                 try:
                     suggestions = spell.candidates(word)
@@ -1156,7 +1273,7 @@ def perform_spell_check(unpacked_folder_name):
                 spell_results.append({
                     'word': word,
                     'suggestions': suggestions,
-                    'context_usage': len([w for w in words if w.lower() == word.lower()])  # How many times it appears
+                    'context_usage': word_counts[word.lower()]  # How many times it appears
                 })
         except Exception as e:
             return None, f"Error generating spelling suggestions: {str(e)}"
@@ -1174,7 +1291,6 @@ def perform_spell_check(unpacked_folder_name):
         unique_errors = [result for result in spell_results if result['context_usage'] == 1]
         
         # Get custom dictionary info
-        custom_dict_words = load_custom_dictionary()
         custom_words_used = [word for word in unique_words if word.lower() in custom_dict_words]
         
         # Create comprehensive results
@@ -1311,6 +1427,22 @@ def get_custom_dictionary_words():
         print(f"Error getting dictionary words: {e}")
         return []
 
+# Spell checkers with a custom dictionary loaded, keyed by dictionary path
+spell_checker_cache = {}
+
+def get_spell_checker(custom_dict_path):
+    """Get a spell checker with the given custom dictionary, rebuilt only when the file changes"""
+    signature = get_file_signature(custom_dict_path)
+    cached = spell_checker_cache.get(custom_dict_path)
+    if cached is None or cached['signature'] != signature:
+        spell = SpellChecker()
+        if signature is not None:
+            with open(custom_dict_path, 'r', encoding='utf-8') as f:
+                spell.word_frequency.load_words([line.strip().lower() for line in f if line.strip()])
+        cached = {'signature': signature, 'spell': spell}
+        spell_checker_cache[custom_dict_path] = cached
+    return cached['spell']
+
 def analyze_world_content(unpacked_folder_name):
     """Analyze world content to extract educational themes and information"""
     try:
@@ -1319,10 +1451,10 @@ def analyze_world_content(unpacked_folder_name):
         # Find and analyze language files
         lang_files = find_language_files(unpacked_folder_name)
         if lang_files:
-            # Get the largest English file for analysis
-            english_files = [f for f in lang_files if f['is_english']]
-            if english_files:
-                largest_file = max(english_files, key=lambda x: x['size_bytes'])
+            # Get the largest English file for analysis in a single pass
+            largest_file = max((f for f in lang_files if f['is_english']),
+                               key=lambda x: x['size_bytes'], default=None)
+            if largest_file:
                 educational_text = extract_text_from_lang_file(largest_file['full_path'])
                 
                 if educational_text:
@@ -1344,44 +1476,71 @@ def analyze_world_content(unpacked_folder_name):
         print(f"Error analyzing world content: {e}")
         return {}
 
+# World content analyses keyed by unpacked folder, replaced when the folder changes on disk
+world_content_cache = {}
+
+def analyze_world_content_cached(unpacked_folder_name, folder_signature):
+    """Get the world content analysis for a folder, rerun only when its signature changes"""
+    cached = world_content_cache.get(unpacked_folder_name)
+    if cached is None or cached['signature'] != folder_signature:
+        cached = {'signature': folder_signature, 'result': analyze_world_content(unpacked_folder_name)}
+        world_content_cache[unpacked_folder_name] = cached
+    return cached['result']
+
+def prune_analysis_caches():
+    """Drop cached analyses of folders that are no longer unpacked"""
+    unpacked_folders = {world.get('folder_name') for world in load_json_cached(UNPACKED_METADATA_FILE, [])['data']}
+    for cache in (world_content_cache, language_analysis_cache):
+        for folder_name in cache.keys() - unpacked_folders:
+            del cache[folder_name]
+
+# Theme keywords used to detect the educational themes of a world
+THEME_KEYWORDS = MappingProxyType({
+    'sustainability': ('sustainability', 'environment', 'green', 'renewable', 'conservation', 'recycle', 'eco'),
+    'science': ('experiment', 'hypothesis', 'research', 'laboratory', 'scientific', 'discovery', 'analysis'),
+    'history': ('historical', 'ancient', 'civilization', 'culture', 'heritage', 'timeline', 'era'),
+    'geography': ('geography', 'climate', 'terrain', 'landscape', 'region', 'continent', 'natural'),
+    'mathematics': ('mathematics', 'calculation', 'equation', 'geometry', 'measurement', 'statistics'),
+    'technology': ('technology', 'innovation', 'engineering', 'digital', 'computer', 'automation'),
+    'biology': ('biology', 'ecosystem', 'organism', 'species', 'habitat', 'biodiversity', 'life'),
+    'chemistry': ('chemistry', 'chemical', 'reaction', 'compound', 'element', 'molecular'),
+    'physics': ('physics', 'energy', 'force', 'motion', 'gravity', 'electricity', 'magnetism'),
+    'social_studies': ('community', 'society', 'citizenship', 'government', 'democracy', 'rights'),
+    'economics': ('economics', 'trade', 'business', 'market', 'economy', 'resource', 'production'),
+    'art': ('art', 'creative', 'design', 'aesthetic', 'artistic', 'visual', 'cultural')
+})
+
+# One case-insensitive pattern per theme, so the text is scanned without
+# making a lowercased copy. Themes are kept separate because keywords overlap
+# (e.g. 'eco' and 'economics') and a single alternation would hide matches.
+THEME_PATTERNS = tuple(
+    (theme.replace('_', ' ').title(), re.compile('|'.join(map(re.escape, keywords)), re.IGNORECASE))
+    for theme, keywords in THEME_KEYWORDS.items()
+)
+
 def extract_educational_themes(text):
     """Extract main educational themes from text content"""
-    themes = []
-    
-    # Define theme keywords and their associated themes
-    theme_keywords = {
-        'sustainability': ['sustainability', 'environment', 'green', 'renewable', 'conservation', 'recycle', 'eco'],
-        'science': ['experiment', 'hypothesis', 'research', 'laboratory', 'scientific', 'discovery', 'analysis'],
-        'history': ['historical', 'ancient', 'civilization', 'culture', 'heritage', 'timeline', 'era'],
-        'geography': ['geography', 'climate', 'terrain', 'landscape', 'region', 'continent', 'natural'],
-        'mathematics': ['mathematics', 'calculation', 'equation', 'geometry', 'measurement', 'statistics'],
-        'technology': ['technology', 'innovation', 'engineering', 'digital', 'computer', 'automation'],
-        'biology': ['biology', 'ecosystem', 'organism', 'species', 'habitat', 'biodiversity', 'life'],
-        'chemistry': ['chemistry', 'chemical', 'reaction', 'compound', 'element', 'molecular'],
-        'physics': ['physics', 'energy', 'force', 'motion', 'gravity', 'electricity', 'magnetism'],
-        'social_studies': ['community', 'society', 'citizenship', 'government', 'democracy', 'rights'],
-        'economics': ['economics', 'trade', 'business', 'market', 'economy', 'resource', 'production'],
-        'art': ['art', 'creative', 'design', 'aesthetic', 'artistic', 'visual', 'cultural']
-    }
-    
-    text_lower = text.lower()
-    for theme, keywords in theme_keywords.items():
-        if any(keyword in text_lower for keyword in keywords):
-            themes.append(theme.replace('_', ' ').title())
+    themes = [theme for theme, pattern in THEME_PATTERNS if pattern.search(text)]
     
     return themes[:5]  # Return top 5 themes
 
 def extract_key_concepts(text):
     """Extract key concepts and vocabulary from educational text"""
-    # Simple approach - extract longer phrases and important terms
-    words = text.split()
+    max_concepts = 10
     concepts = []
     
+    # Simple approach - extract longer phrases and important terms.
+    # Stop as soon as enough concepts are found so the work is bounded by
+    # the result size rather than by the size of the text.
+    
     # Look for capitalized terms (proper nouns, important concepts)
-    for word in words:
+    for match in re.finditer(r'\S+', text):
+        word = match.group()
         if len(word) > 3 and word[0].isupper() and word not in ['The', 'This', 'That', 'And', 'But', 'Or']:
             if word not in concepts:
                 concepts.append(word)
+                if len(concepts) == max_concepts:
+                    return concepts
     
     # Look for phrases that might be key concepts
     sentences = text.split('.')
@@ -1393,42 +1552,44 @@ def extract_key_concepts(text):
                 concept = sentence.strip()
                 if concept not in concepts:
                     concepts.append(concept)
-    
-    return concepts[:10]  # Return top 10 key concepts
+                    if len(concepts) == max_concepts:
+                        break
+    
+    return concepts  # Return top 10 key concepts
+
+# Base objectives templates for different themes
+OBJECTIVE_TEMPLATES = MappingProxyType({
+    'Sustainability': (
+        'Students will understand the importance of environmental conservation',
+        'Students will identify renewable and non-renewable resources',
+        'Students will analyze the impact of human activities on the environment'
+    ),
+    'Science': (
+        'Students will apply the scientific method to investigate phenomena',
+        'Students will analyze data and draw evidence-based conclusions',
+        'Students will understand key scientific principles and concepts'
+    ),
+    'History': (
+        'Students will analyze historical events and their significance',
+        'Students will understand cause and effect relationships in history',
+        'Students will compare different historical periods and cultures'
+    ),
+    'Geography': (
+        'Students will identify and analyze geographic features and patterns',
+        'Students will understand the relationship between humans and their environment',
+        'Students will use geographic tools and technologies effectively'
+    )
+})
 
 def generate_learning_objectives(text):
     """Generate learning objectives based on content analysis"""
     themes = extract_educational_themes(text)
     objectives = []
     
-    # Base objectives templates for different themes
-    objective_templates = {
-        'Sustainability': [
-            'Students will understand the importance of environmental conservation',
-            'Students will identify renewable and non-renewable resources',
-            'Students will analyze the impact of human activities on the environment'
-        ],
-        'Science': [
-            'Students will apply the scientific method to investigate phenomena',
-            'Students will analyze data and draw evidence-based conclusions',
-            'Students will understand key scientific principles and concepts'
-        ],
-        'History': [
-            'Students will analyze historical events and their significance',
-            'Students will understand cause and effect relationships in history',
-            'Students will compare different historical periods and cultures'
-        ],
-        'Geography': [
-            'Students will identify and analyze geographic features and patterns',
-            'Students will understand the relationship between humans and their environment',
-            'Students will use geographic tools and technologies effectively'
-        ]
-    }
-    
     # Generate objectives based on detected themes
     for theme in themes:
-        if theme in objective_templates:
-            objectives.extend(objective_templates[theme])
+        if theme in OBJECTIVE_TEMPLATES:
+            objectives.extend(OBJECTIVE_TEMPLATES[theme])
     
     # Add general objectives if no specific themes detected
     if not objectives:
@@ -1485,36 +1646,90 @@ def analyze_world_structure(world_path):
 def generate_educational_resource(unpacked_folder_name, resource_type):
     """Generate a specific type of educational resource"""
     try:
-        # Analyze world content first
-        world_data = analyze_world_content(unpacked_folder_name)
+        # Reject unknown resource types before doing any analysis work
+        generator = RESOURCE_GENERATORS.get(resource_type)
+        if not generator:
+            return None
+        
+        # Analyze world content first, reusing the previous analysis while the folder is unchanged
+        unpacked_path = os.path.join(app.config['UNPACKED_FOLDER'], unpacked_folder_name)
+        world_data = analyze_world_content_cached(unpacked_folder_name, get_folder_signature(unpacked_path))
         
         if not world_data:
             return None
             
         # Generate resource based on type
-        if resource_type == 'lesson_plan':
-            return generate_lesson_plan(world_data)
-        elif resource_type == 'student_quiz':
-            return generate_student_quiz(world_data)
-        elif resource_type == 'topic_introduction':
-            return generate_topic_introduction(world_data)
-        elif resource_type == 'parent_letter':
-            return generate_parent_letter(world_data)
-        else:
-            return None
+        return generator(world_data)
             
     except Exception as e:
         print(f"Error generating educational resource: {e}")
         return None
 
+# Lesson plan timeline shared by every generated lesson plan
+LESSON_STRUCTURE = {
+    'introduction': {
+        'time': '10 minutes',
+        'activities': (
+            'Welcome students and introduce the lesson topic',
+            'Review learning objectives and expectations',
+            'Demonstrate basic Minecraft Education controls if needed',
+            'Explain the virtual world they will be exploring'
+        )
+    },
+    'main_activity': {
+        'time': '25-35 minutes',
+        'activities': (
+            'Students load the educational world',
+            'Guide students through key learning areas',
+            'Encourage exploration and interaction with educational content',
+            'Facilitate collaborative problem-solving activities',
+            'Monitor student progress and provide assistance as needed'
+        )
+    },
+    'conclusion': {
+        'time': '10-15 minutes',
+        'activities': (
+            'Students share discoveries and insights',
+            'Review key concepts learned during the session',
+            'Connect virtual learning to real-world applications',
+            'Assign follow-up activities or homework if applicable'
+        )
+    }
+}
+
+# Assessment strategies included in every lesson plan
+LESSON_ASSESSMENT_STRATEGIES = (
+    'Observe student engagement and participation',
+    'Review student responses to in-world activities',
+    'Conduct exit ticket or quick quiz on key concepts',
+    'Evaluate collaborative skills and teamwork'
+)
+
+# Extension activities included in every lesson plan
+LESSON_EXTENSION_ACTIVITIES = (
+    'Research project on lesson themes',
+    'Create presentation about discoveries made in the world',
+    'Design own Minecraft structures related to the topic',
+    'Write reflection journal about the learning experience'
+)
+
+# Differentiation strategies included in every lesson plan
+LESSON_DIFFERENTIATION = (
+    'Pair struggling students with more experienced players',
+    'Provide additional time for students who need it',
+    'Offer advanced challenges for quick finishers',
+    'Use visual and auditory cues for different learning styles'
+)
+
 def generate_lesson_plan(world_data):
     """Generate a comprehensive lesson plan"""
     themes = world_data.get('themes', ['Interactive Learning'])
     objectives = world_data.get('learning_objectives', [])
     world_info = world_data.get('world_info', {})
+    primary_theme = themes[0] if themes else 'Interactive Learning'
     
     lesson_plan = {
-        'title': f"Minecraft Education Lesson: {themes[0] if themes else 'Interactive Learning'}",
+        'title': f"Minecraft Education Lesson: {primary_theme}",
         'grade_level': world_info.get('estimated_age_range', 'Middle School (Ages 11-14)'),
         'duration': '45-60 minutes',
         'subject_areas': themes,
@@ -1526,66 +1741,92 @@ def generate_lesson_plan(world_data):
             'Student worksheets (optional)',
             'Projector/Smart Board for demonstrations'
         ],
-        'lesson_structure': {
-            'introduction': {
-                'time': '10 minutes',
-                'activities': [
-                    'Welcome students and introduce the lesson topic',
-                    'Review learning objectives and expectations',
-                    'Demonstrate basic Minecraft Education controls if needed',
-                    'Explain the virtual world they will be exploring'
-                ]
-            },
-            'main_activity': {
-                'time': '25-35 minutes',
-                'activities': [
-                    'Students load the educational world',
-                    'Guide students through key learning areas',
-                    'Encourage exploration and interaction with educational content',
-                    'Facilitate collaborative problem-solving activities',
-                    'Monitor student progress and provide assistance as needed'
-                ]
-            },
-            'conclusion': {
-                'time': '10-15 minutes',
-                'activities': [
-                    'Students share discoveries and insights',
-                    'Review key concepts learned during the session',
-                    'Connect virtual learning to real-world applications',
-                    'Assign follow-up activities or homework if applicable'
-                ]
-            }
-        },
-        'assessment_strategies': [
-            'Observe student engagement and participation',
-            'Review student responses to in-world activities',
-            'Conduct exit ticket or quick quiz on key concepts',
-            'Evaluate collaborative skills and teamwork'
-        ],
-        'extension_activities': [
-            'Research project on lesson themes',
-            'Create presentation about discoveries made in the world',
-            'Design own Minecraft structures related to the topic',
-            'Write reflection journal about the learning experience'
-        ],
-        'differentiation': [
-            'Pair struggling students with more experienced players',
-            'Provide additional time for students who need it',
-            'Offer advanced challenges for quick finishers',
-            'Use visual and auditory cues for different learning styles'
-        ]
+        # Copy the shared sections so changes to one resource don't leak into later ones
+        'lesson_structure': {phase: dict(details) for phase, details in LESSON_STRUCTURE.items()},
+        'assessment_strategies': LESSON_ASSESSMENT_STRATEGIES,
+        'extension_activities': LESSON_EXTENSION_ACTIVITIES,
+        'differentiation': LESSON_DIFFERENTIATION
     }
     
     return lesson_plan
 
+# Multiple choice questions for sustainability themed worlds
+SUSTAINABILITY_QUIZ_QUESTIONS = (
+    {
+        'type': 'multiple_choice',
+        'question': 'What is the most important benefit of renewable energy sources?',
+        'options': (
+            'They are cheaper to build',
+            'They do not run out over time',
+            'They are easier to transport',
+            'They work in all weather conditions'
+        ),
+        'correct_answer': 1,
+        'explanation': 'Renewable energy sources like solar and wind do not run out over time, unlike fossil fuels.'
+    },
+    {
+        'type': 'multiple_choice',
+        'question': 'Which of these activities helps reduce waste?',
+        'options': (
+            'Buying more products',
+            'Recycling materials',
+            'Using disposable items',
+            'Throwing everything away'
+        ),
+        'correct_answer': 1,
+        'explanation': 'Recycling materials helps reduce waste by giving materials a second life.'
+    }
+)
+
+# Multiple choice questions for science themed worlds
+SCIENCE_QUIZ_QUESTIONS = (
+    {
+        'type': 'multiple_choice',
+        'question': 'What is the first step in the scientific method?',
+        'options': (
+            'Conduct an experiment',
+            'Make an observation',
+            'Form a conclusion',
+            'Analyze data'
+        ),
+        'correct_answer': 1,
+        'explanation': 'The scientific method begins with making an observation about the world around us.'
+    },
+)
+
+# True/False questions included in every quiz
+TRUE_FALSE_QUIZ_QUESTIONS = (
+    {
+        'type': 'true_false',
+        'question': 'Minecraft Education Edition can be used to learn about real-world concepts.',
+        'correct_answer': True,
+        'explanation': 'Minecraft Education Edition is specifically designed to teach real-world concepts through virtual exploration.'
+    },
+    {
+        'type': 'true_false',
+        'question': 'Working together in Minecraft Education is discouraged.',
+        'correct_answer': False,
+        'explanation': 'Collaboration and teamwork are encouraged in Minecraft Education to enhance learning.'
+    }
+)
+
+# Short answer question connecting the world to real-world applications
+REAL_WORLD_QUIZ_QUESTION = {
+    'type': 'short_answer',
+    'question': 'Describe one way the concepts you learned in Minecraft could be applied in the real world.',
+    'sample_answer': 'Students should connect virtual learning to real-world applications, showing critical thinking skills.',
+    'points': 5
+}
+
 def generate_student_quiz(world_data):
     """Generate a student quiz based on world content"""
     themes = world_data.get('themes', ['Interactive Learning'])
     key_concepts = world_data.get('key_concepts', [])
     educational_content = world_data.get('educational_content', '')
+    primary_theme = themes[0] if themes else 'Interactive Learning'
     
     quiz = {
-        'title': f"Quiz: {themes[0] if themes else 'Interactive Learning'} in Minecraft",
+        'title': f"Quiz: {primary_theme} in Minecraft",
         'instructions': 'Answer the following questions based on your exploration of the Minecraft Education world.',
         'questions': []
     }
@@ -1595,80 +1836,24 @@ def generate_student_quiz(world_data):
     
     # Multiple choice questions based on themes
     if 'Sustainability' in themes:
-        questions.extend([
-            {
-                'type': 'multiple_choice',
-                'question': 'What is the most important benefit of renewable energy sources?',
-                'options': [
-                    'They are cheaper to build',
-                    'They do not run out over time',
-                    'They are easier to transport',
-                    'They work in all weather conditions'
-                ],
-                'correct_answer': 1,
-                'explanation': 'Renewable energy sources like solar and wind do not run out over time, unlike fossil fuels.'
-            },
-            {
-                'type': 'multiple_choice',
-                'question': 'Which of these activities helps reduce waste?',
-                'options': [
-                    'Buying more products',
-                    'Recycling materials',
-                    'Using disposable items',
-                    'Throwing everything away'
-                ],
-                'correct_answer': 1,
-                'explanation': 'Recycling materials helps reduce waste by giving materials a second life.'
-            }
-        ])
+        questions.extend(map(dict, SUSTAINABILITY_QUIZ_QUESTIONS))
     
     if 'Science' in themes:
-        questions.extend([
-            {
-                'type': 'multiple_choice',
-                'question': 'What is the first step in the scientific method?',
-                'options': [
-                    'Conduct an experiment',
-                    'Make an observation',
-                    'Form a conclusion',
-                    'Analyze data'
-                ],
-                'correct_answer': 1,
-                'explanation': 'The scientific method begins with making an observation about the world around us.'
-            }
-        ])
+        questions.extend(map(dict, SCIENCE_QUIZ_QUESTIONS))
     
     # True/False questions
-    questions.extend([
-        {
-            'type': 'true_false',
-            'question': 'Minecraft Education Edition can be used to learn about real-world concepts.',
-            'correct_answer': True,
-            'explanation': 'Minecraft Education Edition is specifically designed to teach real-world concepts through virtual exploration.'
-        },
-        {
-            'type': 'true_false',
-            'question': 'Working together in Minecraft Education is discouraged.',
-            'correct_answer': False,
-            'explanation': 'Collaboration and teamwork are encouraged in Minecraft Education to enhance learning.'
-        }
-    ])
+    questions.extend(map(dict, TRUE_FALSE_QUIZ_QUESTIONS))
     
     # Short answer questions based on content
     if key_concepts:
         questions.append({
             'type': 'short_answer',
-            'question': f'Explain what you learned about {key_concepts[0] if key_concepts else "the main topic"} in the Minecraft world.',
-            'sample_answer': f'Students should demonstrate understanding of {key_concepts[0] if key_concepts else "the main topic"} through specific examples from their virtual exploration.',
+            'question': f'Explain what you learned about {key_concepts[0]} in the Minecraft world.',
+            'sample_answer': f'Students should demonstrate understanding of {key_concepts[0]} through specific examples from their virtual exploration.',
             'points': 5
         })
     
-    questions.append({
-        'type': 'short_answer',
-        'question': 'Describe one way the concepts you learned in Minecraft could be applied in the real world.',
-        'sample_answer': 'Students should connect virtual learning to real-world applications, showing critical thinking skills.',
-        'points': 5
-    })
+    questions.append(dict(REAL_WORLD_QUIZ_QUESTION))
     
     # Essay question
     questions.append({
@@ -1687,6 +1872,35 @@ def generate_student_quiz(world_data):
     
     return quiz
 
+# Getting started steps included in every topic introduction
+INTRODUCTION_GETTING_STARTED = (
+    'Launch Minecraft Education Edition on your device',
+    'Join the educational world with your classmates',
+    'Follow the guided tour to familiarize yourself with the environment',
+    'Pay attention to signs, NPCs, and interactive elements',
+    'Work together with your peers to complete activities',
+    'Ask questions and explore beyond the basic requirements'
+)
+
+# Learning tips included in every topic introduction
+INTRODUCTION_LEARNING_TIPS = (
+    'Take your time to read all informational content',
+    'Experiment with different approaches to problems',
+    'Discuss your findings with classmates',
+    'Connect what you see in Minecraft to the real world',
+    'Keep notes of important discoveries',
+    'Don\'t be afraid to explore and try new things'
+)
+
+# Success indicators included in every topic introduction
+INTRODUCTION_SUCCESS_INDICATORS = (
+    'You can explain key concepts in your own words',
+    'You can provide real-world examples of the concepts',
+    'You actively participate in group activities',
+    'You ask thoughtful questions about the subject matter',
+    'You make connections between virtual and real experiences'
+)
+
 def generate_topic_introduction(world_data):
     """Generate an introduction to the topic/theme"""
     themes = world_data.get('themes', ['Interactive Learning'])
@@ -1708,33 +1922,60 @@ def generate_topic_introduction(world_data):
         'key_vocabulary': key_concepts[:8] if key_concepts else [
             'Interactive Learning', 'Virtual Environment', 'Educational Content', 'Collaboration'
         ],
-        'getting_started': [
-            'Launch Minecraft Education Edition on your device',
-            'Join the educational world with your classmates',
-            'Follow the guided tour to familiarize yourself with the environment',
-            'Pay attention to signs, NPCs, and interactive elements',
-            'Work together with your peers to complete activities',
-            'Ask questions and explore beyond the basic requirements'
-        ],
-        'learning_tips': [
-            'Take your time to read all informational content',
-            'Experiment with different approaches to problems',
-            'Discuss your findings with classmates',
-            'Connect what you see in Minecraft to the real world',
-            'Keep notes of important discoveries',
-            'Don\'t be afraid to explore and try new things'
-        ],
-        'success_indicators': [
-            'You can explain key concepts in your own words',
-            'You can provide real-world examples of the concepts',
-            'You actively participate in group activities',
-            'You ask thoughtful questions about the subject matter',
-            'You make connections between virtual and real experiences'
-        ]
+        'getting_started': INTRODUCTION_GETTING_STARTED,
+        'learning_tips': INTRODUCTION_LEARNING_TIPS,
+        'success_indicators': INTRODUCTION_SUCCESS_INDICATORS
     }
     
     return introduction
 
+# Parent letter sections that do not depend on the world
+PARENT_LETTER_ABOUT_MINECRAFT_EDUCATION = {
+    'title': 'What is Minecraft Education Edition?',
+    'content': 'Minecraft Education Edition is a game-based learning platform that promotes creativity, collaboration, and problem-solving in an immersive digital environment. It is specifically designed for educational use and is used by millions of students worldwide to learn subjects ranging from history and science to mathematics and language arts.'
+}
+
+# Learning benefits listed in every parent letter
+PARENT_LETTER_BENEFITS = (
+    'Engages students through interactive, hands-on exploration',
+    'Promotes collaboration and teamwork skills',
+    'Develops problem-solving and critical thinking abilities',
+    'Makes abstract concepts tangible and understandable',
+    'Accommodates different learning styles and paces',
+    'Connects virtual learning to real-world applications'
+)
+
+# Safety section included in every parent letter
+PARENT_LETTER_SAFETY_AND_MONITORING = {
+    'title': 'Safety and Supervision',
+    'content': 'Minecraft Education Edition provides a safe, controlled environment for learning. Students can only interact with their classmates, and all activities are supervised by the teacher. The platform includes built-in tools for classroom management and student monitoring.'
+}
+
+# Common parent questions included in every parent letter
+PARENT_LETTER_ADDRESSING_CONCERNS = {
+    'title': 'Common Questions and Concerns',
+    'qa': (
+        {
+            'question': 'Is this just playing games instead of learning?',
+            'answer': 'No, this is purposeful, curriculum-aligned learning that happens to use a game-based platform. Studies show that game-based learning can improve engagement and retention of educational content.'
+        },
+        {
+            'question': 'Will my child become too focused on gaming?',
+            'answer': 'Minecraft Education Edition is different from recreational gaming. It is used as a learning tool with specific educational objectives and time limits.'
+        },
+        {
+            'question': 'What if my child is not familiar with Minecraft?',
+            'answer': 'No prior experience is necessary. We will provide instruction on the basic controls and navigation. Many students actually learn these skills quickly.'
+        }
+    )
+}
+
+# Contact section included in every parent letter
+PARENT_LETTER_CONTACT_INFORMATION = {
+    'title': 'Questions or Concerns?',
+    'content': 'If you have any questions about this learning activity or would like to discuss your child\'s progress, please don\'t hesitate to reach out to me. I am committed to ensuring that every student has a positive and educational experience.'
+}
+
 def generate_parent_letter(world_data):
     """Generate a letter for parents introducing the educational game"""
     themes = world_data.get('themes', ['Interactive Learning'])
@@ -1745,20 +1986,11 @@ def generate_parent_letter(world_data):
         'subject': f'Your Child Will Be Learning About {primary_theme} Through Minecraft Education',
         'greeting': 'Dear Parents and Guardians,',
         'introduction': f'I am excited to share with you an innovative learning opportunity that your child will be participating in. We will be using Minecraft Education Edition to explore and learn about {primary_theme.lower()} in an engaging, interactive virtual environment.',
-        'about_minecraft_education': {
-            'title': 'What is Minecraft Education Edition?',
-            'content': 'Minecraft Education Edition is a game-based learning platform that promotes creativity, collaboration, and problem-solving in an immersive digital environment. It is specifically designed for educational use and is used by millions of students worldwide to learn subjects ranging from history and science to mathematics and language arts.'
-        },
+        # Copy the shared sections so changes to one letter don't leak into later ones
+        'about_minecraft_education': dict(PARENT_LETTER_ABOUT_MINECRAFT_EDUCATION),
         'learning_benefits': {
             'title': f'How Will This Help Your Child Learn About {primary_theme}?',
-            'benefits': [
-                'Engages students through interactive, hands-on exploration',
-                'Promotes collaboration and teamwork skills',
-                'Develops problem-solving and critical thinking abilities',
-                'Makes abstract concepts tangible and understandable',
-                'Accommodates different learning styles and paces',
-                'Connects virtual learning to real-world applications'
-            ]
+            'benefits': PARENT_LETTER_BENEFITS
         },
         'what_to_expect': {
             'title': 'What Your Child Will Be Doing',
@@ -1771,10 +2003,7 @@ def generate_parent_letter(world_data):
                 'Presenting findings and sharing discoveries with the class'
             ]
         },
-        'safety_and_monitoring': {
-            'title': 'Safety and Supervision',
-            'content': 'Minecraft Education Edition provides a safe, controlled environment for learning. Students can only interact with their classmates, and all activities are supervised by the teacher. The platform includes built-in tools for classroom management and student monitoring.'
-        },
+        'safety_and_monitoring': dict(PARENT_LETTER_SAFETY_AND_MONITORING),
         'support_at_home': {
             'title': 'How You Can Support Learning at Home',
             'suggestions': [
@@ -1787,38 +2016,27 @@ def generate_parent_letter(world_data):
             ]
         },
         'addressing_concerns': {
-            'title': 'Common Questions and Concerns',
-            'qa': [
-                {
-                    'question': 'Is this just playing games instead of learning?',
-                    'answer': 'No, this is purposeful, curriculum-aligned learning that happens to use a game-based platform. Studies show that game-based learning can improve engagement and retention of educational content.'
-                },
-                {
-                    'question': 'Will my child become too focused on gaming?',
-                    'answer': 'Minecraft Education Edition is different from recreational gaming. It is used as a learning tool with specific educational objectives and time limits.'
-                },
-                {
-                    'question': 'What if my child is not familiar with Minecraft?',
-                    'answer': 'No prior experience is necessary. We will provide instruction on the basic controls and navigation. Many students actually learn these skills quickly.'
-                }
-            ]
-        },
-        'contact_information': {
-            'title': 'Questions or Concerns?',
-            'content': 'If you have any questions about this learning activity or would like to discuss your child\'s progress, please don\'t hesitate to reach out to me. I am committed to ensuring that every student has a positive and educational experience.'
+            'title': PARENT_LETTER_ADDRESSING_CONCERNS['title'],
+            'qa': tuple(map(dict, PARENT_LETTER_ADDRESSING_CONCERNS['qa']))
         },
+        'contact_information': dict(PARENT_LETTER_CONTACT_INFORMATION),
         'closing': 'I look forward to sharing your child\'s learning journey and discoveries with you. Thank you for your continued support of innovative educational approaches.',
         'signature': 'Sincerely,\n[Teacher Name]\n[Subject/Grade Level]\n[School Name]\n[Contact Information]'
     }
     
     return letter
 
+# Resource generators by resource type, as requested by the educational resources page
+RESOURCE_GENERATORS = {
+    'lesson_plan': generate_lesson_plan,
+    'student_quiz': generate_student_quiz,
+    'topic_introduction': generate_topic_introduction,
+    'parent_letter': generate_parent_letter
+}
+
 @login_manager.user_loader
 def load_user(user_id):
-    for user in users.values():
-        if user.id == user_id:
-            return user
-    return None
+    return users_by_id.get(user_id)
 
 @app.route('/')
 def index():
@@ -1864,29 +2082,29 @@ def admin_panel():
     users_data = get_users_data()
     users_list = []
     
+    # Count worlds and unpacked worlds per user in a single pass over each metadata file
+    worlds_by_user = Counter(w.get('uploaded_by') for w in load_metadata())
+    unpacked_by_user = Counter(u.get('unpacked_by') for u in load_unpacked_metadata())
+    
     for username, user_data in users_data.items():
-        # Count user's worlds and unpacked worlds
-        metadata = load_metadata()
-        unpacked_metadata = load_unpacked_metadata()
-        
-        user_worlds = len([w for w in metadata if w.get('uploaded_by') == username])
-        user_unpacked = len([u for u in unpacked_metadata if u.get('unpacked_by') == username])
+        first_name = user_data.get('first_name', '')
+        surname = user_data.get('surname', '')
         
         users_list.append({
             'username': username,
             'id': user_data['id'],
-            'first_name': user_data.get('first_name', ''),
-            'surname': user_data.get('surname', ''),
+            'first_name': first_name,
+            'surname': surname,
             'email': user_data.get('email', ''),
-            'full_name': f"{user_data.get('first_name', '')} {user_data.get('surname', '')}".strip(),
+            'full_name': f"{first_name} {surname}".strip(),
             'is_admin': user_data.get('is_admin', False),
             'created_date': user_data.get('created_date', 'N/A'),
-            'worlds_count': user_worlds,
-            'unpacked_count': user_unpacked
+            'worlds_count': worlds_by_user[username],
+            'unpacked_count': unpacked_by_user[username]
         })
     
     # Sort by creation date (newest first)
-    users_list.sort(key=lambda x: x['created_date'], reverse=True)
+    users_list.sort(key=itemgetter('created_date'), reverse=True)
     
     return render_template('admin_panel.html', user=current_user, users=users_list)
 
@@ -1927,23 +2145,22 @@ def admin_create_user():
         return redirect(url_for('admin_panel'))
     
     # Basic email validation
-    import re
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(email_pattern, email):
+    if not EMAIL_PATTERN.match(email):
         flash('Please enter a valid email address.', 'error')
         return redirect(url_for('admin_panel'))
     
     # Check for invalid characters in username
-    if not username.replace('_', '').replace('-', '').isalnum():
+    if not USERNAME_PATTERN.match(username):
         flash('Username can only contain letters, numbers, hyphens, and underscores.', 'error')
         return redirect(url_for('admin_panel'))
     
-    success, message = create_user(username, password, first_name, surname, email, is_admin_user)
+    success, message, user_data = create_user(username, password, first_name, surname, email, is_admin_user)
     
     if success:
-        # Reload users to include the new user
-        global users
-        users = load_users()
+        # Add the new user to the in-memory lookups
+        new_user = User(user_data['id'], user_data['username'], user_data['password_hash'])
+        users[username] = new_user
+        users_by_id[new_user.id] = new_user
         flash(message, 'success')
     else:
         flash(message, 'error')
@@ -1965,9 +2182,10 @@ def admin_delete_user(username):
     success, message = delete_user_and_data(username)
     
     if success:
-        # Reload users to reflect the deletion
-        global users
-        users = load_users()
+        # Remove the user from the in-memory lookups
+        deleted_user = users.pop(username, None)
+        if deleted_user:
+            users_by_id.pop(deleted_user.id, None)
         flash(message, 'success')
     else:
         flash(message, 'error')
@@ -1985,12 +2203,7 @@ def forgot_password():
             return render_template('forgot_password.html')
         
         # Check if email exists
-        users_data = get_users_data()
-        user_found = False
-        for user_data in users_data.values():
-            if user_data.get('email', '').lower() == email:
-                user_found = True
-                break
+        user_found = is_registered_email(email)
         
         # Always show success message for security (don't reveal if email exists)
         flash('If your email address is registered, you will receive password reset instructions shortly.', 'info')
@@ -2009,15 +2222,11 @@ def forgot_password():
 def dashboard():
     """Main dashboard page for Minecraft Education content management"""
     # Clean up orphaned unpacked metadata and verify unpacked statuses
-    clean_unpacked_metadata()
-    verify_unpacked_status()
+    run_metadata_housekeeping()
     
-    worlds = load_metadata()
-    unpacked_worlds = load_unpacked_metadata()
-    
-    # Sort by upload date (newest first)
-    worlds.sort(key=lambda x: x['upload_date'], reverse=True)
-    unpacked_worlds.sort(key=lambda x: x['unpacked_date'], reverse=True)
+    # Newest first, sorted once per change to the metadata files
+    worlds = load_metadata_newest_first(METADATA_FILE, 'upload_date')
+    unpacked_worlds = load_metadata_newest_first(UNPACKED_METADATA_FILE, 'unpacked_date')
     
     return render_template('dashboard.html', user=current_user, worlds=worlds, unpacked_worlds=unpacked_worlds)
 
@@ -2042,13 +2251,14 @@ def upload_world():
     
     if file and allowed_file(file.filename):
         original_filename = file.filename
-        # Create a unique filename to avoid conflicts
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{timestamp}_{secure_filename(original_filename)}"
+        # Create a unique filename to avoid conflicts, with a random suffix so
+        # uploads of the same file within the same second don't overwrite each other
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
+        filename = f"{timestamp}_{secrets.token_hex(3)}_{secure_filename(original_filename)}"
         
         try:
             file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
+            file.save(file_path, buffer_size=UPLOAD_BUFFER_SIZE)
             
             # Add metadata
             file_info = add_file_metadata(filename, original_filename, current_user.username)
@@ -2093,13 +2303,7 @@ def repack_world_route(unpacked_id):
 @login_required
 def download_world(world_id):
     """Download a world file"""
-    metadata = load_metadata()
-    world = None
-    
-    for w in metadata:
-        if w['id'] == world_id:
-            world = w
-            break
+    world = get_world_by_id(world_id)
     
     if not world:
         flash('World not found', 'error')
@@ -2112,7 +2316,9 @@ def download_world(world_id):
             flash('World file not found on disk', 'error')
             return redirect(url_for('dashboard'))
         
-        return send_file(file_path, as_attachment=True, download_name=world['original_filename'])
+        # Served with ETag/Last-Modified and Range support so repeat and resumed downloads are cheap
+        return send_from_directory(app.config['UPLOAD_FOLDER'], world['filename'], as_attachment=True,
+                                   download_name=world['original_filename'], conditional=True)
     
     except Exception as e:
         flash(f'Error downloading world: {str(e)}', 'error')
@@ -2122,15 +2328,7 @@ def download_world(world_id):
 @login_required
 def delete_world(world_id):
     """Delete a world file"""
-    metadata = load_metadata()
-    world = None
-    world_index = -1
-    
-    for i, w in enumerate(metadata):
-        if w['id'] == world_id:
-            world = w
-            world_index = i
-            break
+    world = get_world_by_id(world_id)
     
     if not world:
         flash('World not found', 'error')
@@ -2143,7 +2341,9 @@ def delete_world(world_id):
             os.remove(file_path)
         
         # Remove from metadata
-        metadata.pop(world_index)
+        metadata = load_metadata()
+        # IDs can repeat; remove only the first match, as get_world_by_id returns
+        metadata.pop(next(i for i, w in enumerate(metadata) if w['id'] == world_id))
         save_metadata(metadata)
         
         flash(f'Successfully deleted "{world["original_filename"]}"', 'success')
@@ -2157,8 +2357,7 @@ def delete_world(world_id):
 @login_required
 def language_tools():
     """Language Tools main page"""
-    unpacked_worlds = load_unpacked_metadata()
-    unpacked_worlds.sort(key=lambda x: x['unpacked_date'], reverse=True)
+    unpacked_worlds = load_metadata_newest_first(UNPACKED_METADATA_FILE, 'unpacked_date')
     return render_template('language_tools.html', user=current_user, unpacked_worlds=unpacked_worlds)
 
 @app.route('/language_tools/<int:unpacked_id>')
@@ -2200,7 +2399,8 @@ def analyze_language_route(unpacked_id):
         return jsonify({'error': 'Unpacked world not found'}), 404
     
     try:
-        analysis, error = perform_language_analysis(world['folder_name'])
+        unpacked_path = os.path.join(app.config['UNPACKED_FOLDER'], world['folder_name'])
+        analysis, error = perform_language_analysis_cached(world['folder_name'], get_folder_signature(unpacked_path))
         
         if error:
             return jsonify({'error': error}), 400
@@ -2285,8 +2485,7 @@ def get_custom_dictionary():
 @login_required
 def educational_resources():
     """Educational resources main page - shows list of unpacked worlds"""
-    unpacked_worlds = load_unpacked_metadata()
-    unpacked_worlds.sort(key=lambda x: x['unpacked_date'], reverse=True)
+    unpacked_worlds = load_metadata_newest_first(UNPACKED_METADATA_FILE, 'unpacked_date')
     return render_template('educational_resources_list.html', user=current_user, unpacked_worlds=unpacked_worlds)
 
 @app.route('/educational_resources/<int:unpacked_id>')
@@ -2384,26 +2583,25 @@ def api_get_file_content(unpacked_id):
         return jsonify({'error': 'File path is required'}), 400
     
     try:
-        # Construct full path to the file
-        unpacked_folder = os.path.join(app.config['UNPACKED_FOLDER'], world['folder_name'])
-        full_file_path = os.path.join(unpacked_folder, file_path)
-        
-        # Security check - ensure file is within the unpacked folder
-        if not os.path.abspath(full_file_path).startswith(os.path.abspath(unpacked_folder)):
+        # Construct full path to the file, ensuring it is within the unpacked folder
+        full_file_path = resolve_unpacked_file_path(world, file_path)
+        if not full_file_path:
             return jsonify({'error': 'Invalid file path'}), 400
         
         # Check if file exists
         if not os.path.exists(full_file_path):
             return jsonify({'error': 'File not found'}), 404
         
-        # Read file content
+        # Read file content once, decoding as latin-1 if it isn't valid UTF-8
+        with open(full_file_path, 'rb') as file:
+            raw_content = file.read()
         try:
-            with open(full_file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
+            content = raw_content.decode('utf-8')
         except UnicodeDecodeError:
-            # Try with different encoding if UTF-8 fails
-            with open(full_file_path, 'r', encoding='latin-1') as file:
-                content = file.read()
+            content = raw_content.decode('latin-1')
+        # Match text mode's universal newline handling
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
         
         return jsonify({
             'success': True,
@@ -2434,12 +2632,9 @@ def api_save_file_content(unpacked_id):
         return jsonify({'error': 'File path and content are required'}), 400
     
     try:
-        # Construct full path to the file
-        unpacked_folder = os.path.join(app.config['UNPACKED_FOLDER'], world['folder_name'])
-        full_file_path = os.path.join(unpacked_folder, file_path)
-        
-        # Security check - ensure file is within the unpacked folder
-        if not os.path.abspath(full_file_path).startswith(os.path.abspath(unpacked_folder)):
+        # Construct full path to the file, ensuring it is within the unpacked folder
+        full_file_path = resolve_unpacked_file_path(world, file_path)
+        if not full_file_path:
             return jsonify({'error': 'Invalid file path'}), 400
         
         # Create backup of original file
@@ -2460,6 +2655,22 @@ def api_save_file_content(unpacked_id):
     except Exception as e:
         return jsonify({'error': f'Error saving file: {str(e)}'}), 500
 
+# Words for the editor spell check: runs of letters, joined across apostrophes so
+# contractions stay whole; punctuation and digits are dropped
+SPELL_CHECK_WORD_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+# Contraction endings split off by the Treebank tokenizer; the clitic itself is not checked
+SPELL_CHECK_CLITIC_PATTERN = re.compile(r"(?:n't|'(?:s|m|d|ll|re|ve))$")
+
+def tokenize_spell_check_words(text):
+    """Split lowercased text into words to spell check, dropping contraction clitics"""
+    words = []
+    for token in SPELL_CHECK_WORD_PATTERN.findall(text):
+        token = SPELL_CHECK_CLITIC_PATTERN.sub('', token)
+        # Skip words that still hold an apostrophe (e.g. o'clock), as before
+        if len(token) > 1 and "'" not in token:
+            words.append(token)
+    return words
+
 @app.route('/api/spell_check_content', methods=['POST'])
 @login_required
 def api_spell_check_content():
@@ -2473,49 +2684,31 @@ def api_spell_check_content():
         return jsonify({'error': 'Content is required'}), 400
     
     try:
-        # Ensure NLTK data is available
-        try:
-            import nltk
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            try:
-                nltk.download('punkt', quiet=True)
-            except:
-                try:
-                    nltk.download('punkt_tab', quiet=True)
-                except:
-                    pass
+        # Spell checker with the custom dictionary, if it exists
+        spell = get_spell_checker('custom_dictionary.txt')
         
-        # Initialize spell checker with custom dictionary
-        spell = SpellChecker()
+        # Extract text from language file format (only values after =),
+        # tokenizing each educational line once
+        educational_lines = []
         
-        # Load custom dictionary if it exists
-        custom_dict_path = 'custom_dictionary.txt'
-        if os.path.exists(custom_dict_path):
-            with open(custom_dict_path, 'r', encoding='utf-8') as f:
-                custom_words = [word.strip().lower() for word in f.readlines() if word.strip()]
-                spell.word_frequency.load_words(custom_words)
-        
-        # Extract text from language file format (only values after =)
-        educational_text = ""
-        lines = content.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
+        for line_num, line in enumerate(content.split('\n'), 1):
             line = line.strip()
-            if not line or line.startswith('#') or line.startswith('//'):
+            if not line or line.startswith(('#', '//')):
                 continue
             
-            if '=' in line:
-                # Extract key and value parts
-                key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip()
-                
-                # Filter for educational content
-                if is_educational_content(key, value):
-                    educational_text += f"LINE_{line_num}: {value}\n"
+            # Extract key and value parts
+            key, separator, value = line.partition('=')
+            if not separator:
+                continue
+            key = key.strip()
+            value = value.strip()
+            
+            # Filter for educational content
+            if is_educational_content(key, value):
+                line_words = tokenize_spell_check_words(value.lower())
+                educational_lines.append((line_num, line, line_words))
         
-        if not educational_text:
+        if not educational_lines:
             return jsonify({
                 'success': True,
                 'errors': [],
@@ -2524,50 +2717,33 @@ def api_spell_check_content():
             })
         
         # Check spelling
-        words = nltk.word_tokenize(educational_text.lower())
-        if words is None:
-            words = []
-        # Filter out non-alphabetic words and punctuation
-        words = [word for word in words if word.isalpha() and len(word) > 1]
+        words = [word for line_num, line, line_words in educational_lines for word in line_words]
         
         # Find misspelled words
         misspelled = spell.unknown(words)
         if misspelled is None:
             misspelled = set()
         
+        # Generate suggestions once per misspelled word, not once per occurrence
+        suggestions_by_word = {}
+        for word in misspelled:
+            candidates = spell.candidates(word)
+            suggestions_by_word[word] = list(candidates)[:3] if candidates else []
+        
         # Get line-specific errors
         errors_by_line = {}
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line or line.startswith('#') or line.startswith('//'):
-                continue
+        for line_num, line, line_words in educational_lines:
+            line_misspelled = [word for word in line_words if word in misspelled]
+            
+            if line_misspelled:
+                suggestions = {word: suggestions_by_word[word] for word in line_misspelled}
                 
-            if '=' in line:
-                key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip()
-                if is_educational_content(key, value):
-                    line_words = nltk.word_tokenize(value.lower())
-                    if line_words is None:
-                        line_words = []
-                    line_words = [word for word in line_words if word.isalpha() and len(word) > 1]
-                    line_misspelled = [word for word in line_words if word in misspelled]
-                    
-                    if line_misspelled:
-                        suggestions = {}
-                        for word in line_misspelled:
-                            candidates = spell.candidates(word)
-                            if candidates:
-                                suggestions[word] = list(candidates)[:3]
-                            else:
-                                suggestions[word] = []
-                        
-                        errors_by_line[line_num] = {
-                            'line_number': line_num,
-                            'line_text': line,
-                            'misspelled_words': line_misspelled,
-                            'suggestions': suggestions
-                        }
+                errors_by_line[line_num] = {
+                    'line_number': line_num,
+                    'line_text': line,
+                    'misspelled_words': line_misspelled,
+                    'suggestions': suggestions
+                }
         
         return jsonify({
             'success': True,
@@ -2591,11 +2767,9 @@ def view_language_file(unpacked_id, file_path):
         return redirect(url_for('language_tools'))
     
     try:
-        full_path = os.path.join(app.config['UNPACKED_FOLDER'], world['folder_name'], file_path)
-        
         # Security check - ensure the file is within the unpacked folder
-        unpacked_path = os.path.join(app.config['UNPACKED_FOLDER'], world['folder_name'])
-        if not os.path.commonpath([full_path, unpacked_path]) == unpacked_path:
+        full_path = resolve_unpacked_file_path(world, file_path)
+        if not full_path:
             flash('Invalid file path', 'error')
             return redirect(url_for('language_tools_world', unpacked_id=unpacked_id))
         
@@ -2611,7 +2785,7 @@ def view_language_file(unpacked_id, file_path):
             'name': os.path.basename(file_path),
             'path': file_path,
             'size': os.path.getsize(full_path),
-            'lines': len(content.split('\n'))
+            'lines': content.count('\n') + 1
         }
         
         return render_template('view_language_file.html', 
@@ -2634,11 +2808,9 @@ def download_language_file(unpacked_id, file_path):
         return redirect(url_for('language_tools'))
     
     try:
-        full_path = os.path.join(app.config['UNPACKED_FOLDER'], world['folder_name'], file_path)
-        
         # Security check - ensure the file is within the unpacked folder
-        unpacked_path = os.path.join(app.config['UNPACKED_FOLDER'], world['folder_name'])
-        if not os.path.commonpath([full_path, unpacked_path]) == unpacked_path:
+        full_path = resolve_unpacked_file_path(world, file_path)
+        if not full_path:
             flash('Invalid file path', 'error')
             return redirect(url_for('language_tools_world', unpacked_id=unpacked_id))
         
@@ -2652,8 +2824,48 @@ def download_language_file(unpacked_id, file_path):
         flash(f'Error downloading file: {str(e)}', 'error')
         return redirect(url_for('language_tools_world', unpacked_id=unpacked_id))
 
-def generate_language_analysis_pdf(world_info, analysis_data, user_name):
-    """Generate a PDF report for language analysis"""
+# PDF report styles, built once and shared by every report
+PDF_STYLES = getSampleStyleSheet()
+
+PDF_SUBTITLE_STYLE = ParagraphStyle(
+    'SubTitle',
+    parent=PDF_STYLES['Heading2'],
+    fontSize=14,
+    spaceAfter=12,
+    textColor=colors.darkblue
+)
+
+PDF_METRIC_STYLE = ParagraphStyle(
+    'Metric',
+    parent=PDF_STYLES['Normal'],
+    fontSize=11,
+    leftIndent=20,
+    spaceAfter=6
+)
+
+PDF_METADATA_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+PDF_OVERVIEW_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightblue),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+PDF_METADATA_COL_WIDTHS = (2*inch, 4*inch)
+PDF_OVERVIEW_COL_WIDTHS = (2.5*inch, 3.5*inch)
+
+def generate_language_analysis_pdf(world_info, analysis_data, user_name, generated_at):
+    """Generate a PDF report for language analysis, returned as a BytesIO positioned at the start"""
     buffer = io.BytesIO()
     
     # Create the PDF document
@@ -2662,28 +2874,11 @@ def generate_language_analysis_pdf(world_info, analysis_data, user_name):
                           topMargin=72, bottomMargin=18)
     
     # Get styles
-    styles = getSampleStyleSheet()
-    title_style = styles['Title']
-    heading_style = styles['Heading1']
-    subheading_style = styles['Heading2']
-    normal_style = styles['Normal']
-    
-    # Create custom styles
-    subtitle_style = ParagraphStyle(
-        'SubTitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=12,
-        textColor=colors.darkblue
-    )
-    
-    metric_style = ParagraphStyle(
-        'Metric',
-        parent=styles['Normal'],
-        fontSize=11,
-        leftIndent=20,
-        spaceAfter=6
-    )
+    title_style = PDF_STYLES['Title']
+    heading_style = PDF_STYLES['Heading1']
+    normal_style = PDF_STYLES['Normal']
+    subtitle_style = PDF_SUBTITLE_STYLE
+    metric_style = PDF_METRIC_STYLE
     
     # Story container for content
     story = []
@@ -2693,7 +2888,7 @@ def generate_language_analysis_pdf(world_info, analysis_data, user_name):
     story.append(Spacer(1, 20))
     
     # Report metadata
-    report_date = datetime.now().strftime("%B %d, %Y at %I:%M %p")
+    report_date = f"{generated_at:%B %d, %Y at %I:%M %p}"
     metadata_data = [
         ['Report Generated:', report_date],
         ['Analyzed by:', user_name],
@@ -2703,15 +2898,7 @@ def generate_language_analysis_pdf(world_info, analysis_data, user_name):
         ['Unpacked Date:', world_info['unpacked_date']]
     ]
     
-    metadata_table = Table(metadata_data, colWidths=[2*inch, 4*inch])
-    metadata_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ]))
+    metadata_table = Table(metadata_data, colWidths=PDF_METADATA_COL_WIDTHS, style=PDF_METADATA_TABLE_STYLE)
     
     story.append(metadata_table)
     story.append(Spacer(1, 20))
@@ -2728,15 +2915,7 @@ def generate_language_analysis_pdf(world_info, analysis_data, user_name):
         ['Word Count:', f"{file_info.get('extracted_text_words', 0):,} words"]
     ]
     
-    overview_table = Table(overview_data, colWidths=[2.5*inch, 3.5*inch])
-    overview_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightblue),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ]))
+    overview_table = Table(overview_data, colWidths=PDF_OVERVIEW_COL_WIDTHS, style=PDF_OVERVIEW_TABLE_STYLE)
     
     story.append(overview_table)
     story.append(Spacer(1, 20))
@@ -2755,8 +2934,7 @@ def generate_language_analysis_pdf(world_info, analysis_data, user_name):
         f"<b>Average Syllables per Word:</b> {analysis_data.get('avg_syllables_per_word', 'N/A')}"
     ]
     
-    for metric in basic_metrics:
-        story.append(Paragraph(metric, metric_style))
+    story.extend(Paragraph(metric, metric_style) for metric in basic_metrics)
     
     story.append(Spacer(1, 12))
     
@@ -2771,8 +2949,7 @@ def generate_language_analysis_pdf(world_info, analysis_data, user_name):
         f"<b>Automated Readability Index:</b> {analysis_data.get('automated_readability_index', 'N/A')}"
     ]
     
-    for score in reading_scores:
-        story.append(Paragraph(score, metric_style))
+    story.extend(Paragraph(score, metric_style) for score in reading_scores)
     
     story.append(Spacer(1, 12))
     
@@ -2780,8 +2957,7 @@ def generate_language_analysis_pdf(world_info, analysis_data, user_name):
     story.append(Paragraph("Educational Recommendations", subtitle_style))
     recommendations = analysis_data.get('educational_recommendations', [])
     if recommendations:
-        for rec in recommendations:
-            story.append(Paragraph(f"• {rec}", metric_style))
+        story.extend(Paragraph(f"• {rec}", metric_style) for rec in recommendations)
     else:
         story.append(Paragraph("No specific recommendations available.", metric_style))
     
@@ -2795,11 +2971,9 @@ def generate_language_analysis_pdf(world_info, analysis_data, user_name):
     # Build PDF
     doc.build(story)
     
-    # Get the value of the BytesIO buffer and return it
-    pdf_data = buffer.getvalue()
-    buffer.close()
-    
-    return pdf_data
+    # Rewind so the buffer can be sent as-is without copying the PDF bytes
+    buffer.seek(0)
+    return buffer
 
 @app.route('/download_analysis_pdf/<int:unpacked_id>')
 @login_required
@@ -2812,22 +2986,24 @@ def download_analysis_pdf(unpacked_id):
     
     try:
         # Perform language analysis
-        analysis, error = perform_language_analysis(world['folder_name'])
+        unpacked_path = os.path.join(app.config['UNPACKED_FOLDER'], world['folder_name'])
+        analysis, error = perform_language_analysis_cached(world['folder_name'], get_folder_signature(unpacked_path))
         
         if error:
             flash(f'Cannot generate PDF report: {error}', 'error')
             return redirect(url_for('language_tools_world', unpacked_id=unpacked_id))
         
-        # Generate PDF
-        pdf_data = generate_language_analysis_pdf(world, analysis, current_user.username)
+        # Generate PDF, using one timestamp for the report and its filename
+        generated_at = datetime.now()
+        pdf_buffer = generate_language_analysis_pdf(world, analysis, current_user.username, generated_at)
         
-        # Create filename
-        safe_filename = secure_filename(world['original_filename'])
-        filename = f"language_analysis_{safe_filename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        # Create filename (worlds unpacked before safe_filename was stored fall back to computing it)
+        safe_filename = world.get('safe_filename') or secure_filename(world['original_filename'])
+        filename = f"language_analysis_{safe_filename}_{generated_at:%Y%m%d_%H%M%S}.pdf"
         
         # Return PDF as download
         return send_file(
-            io.BytesIO(pdf_data),
+            pdf_buffer,
             mimetype='application/pdf',
             as_attachment=True,
             download_name=filename